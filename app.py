@@ -1,42 +1,80 @@
 """
 Audio File Converter Web Application
 
-A Flask-based web application that provides a user-friendly interface for converting audio files 
+A Quart-based web application that provides a user-friendly interface for converting audio files 
 between different formats, with special support for Audible AAX files.
 
 This module implements a web server that:
 1. Accepts audio file uploads through a modern web interface
 2. Supports conversion between various audio formats (WAV, MP3, OGG, M4A, FLAC)
 3. Handles DRM-protected Audible AAX files using activation bytes
-4. Provides secure file download functionality
+4. Runs conversions as background jobs with a pollable status endpoint
+5. Provides secure file download functionality
 
 The application uses:
-- Flask for web server and routing
-- FFmpeg for audio processing and AAX decryption
-- PyDub for handling standard audio formats
+- Quart (ASGI) for web server and routing
+- A streaming form parser that writes uploads straight to disk
+- FFmpeg for audio processing, format conversion and AAX decryption
+- diskcache for reusing the results of repeated conversions
 - Werkzeug for secure file operations
 """
 
 import os
-from flask import Flask, request, render_template, send_file, jsonify
+import io
+import asyncio
+import hashlib
+import shutil
+from quart import Quart, Request, Response, request, render_template, send_file, jsonify
 from werkzeug.utils import secure_filename
-from pydub import AudioSegment
+import diskcache
+import functools
+import gc
 import uuid
 import logging
 import sys
 import subprocess
 import json
+import re
+import mimetypes
+import time
+import threading
+import concurrent.futures
+from dataclasses import dataclass, field
 
-# Initialize Flask application
-app = Flask(__name__)
+# Uploads stream through many short-lived chunk objects; collect the young
+# generation less often so large transfers are not interrupted by GC passes
+gc.set_threshold(10000, 50, 50)
+
+# Initialize Quart application
+app = Quart(__name__)
 
 # Configure maximum file size (1GB) to handle large audiobooks
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 1024 * 1024 * 1024  # 1GB max file size
 
-# Configure logging for debugging and monitoring
+# Quart's 60 second defaults are too short to receive or send a 1GB audiobook
+app.config['BODY_TIMEOUT'] = 60 * 60
+app.config['RESPONSE_TIMEOUT'] = 60 * 60
+
+# Non-file form fields (format, activation bytes) are tiny; keep them bounded
+app.config['MAX_FORM_MEMORY_SIZE'] = 64 * 1024
+
+# A batch of files plus the format and activation bytes fields;
+# every file part opens a file on disk, so Quart's default of 1000 is far too many
+app.config['MAX_FORM_PARTS'] = 32
+
+# Number of FFmpeg processes allowed to run at once (defaults to one per core)
+app.config['CONVERT_JOBS'] = int(os.environ.get('AUDIO_CONVERT_JOBS', os.cpu_count() or 1))
+
+# Uploads and converted files older than this many seconds are deleted (default 24h)
+app.config['FILE_TTL'] = int(os.environ.get('AUDIO_CONVERT_FILE_TTL', 24 * 60 * 60))
+
+# Disk space reserved for cached conversion results (default 4GB)
+app.config['CACHE_SIZE_LIMIT'] = int(os.environ.get('AUDIO_CONVERT_CACHE_SIZE', 4 * 1024 * 1024 * 1024))
+
+# Configure logging for monitoring (set LOG_LEVEL=DEBUG for debugging)
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(sys.stdout)
@@ -49,13 +87,109 @@ try:
     upload_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads'))
     os.makedirs(upload_dir, exist_ok=True)
     app.config['UPLOAD_FOLDER'] = upload_dir
-    logger.info(f"Upload directory created at: {upload_dir}")
+    logger.info("Upload directory created at: %s", upload_dir)
+except Exception as e:
+    logger.error("Failed to create upload directory: %s", e)
+    sys.exit(1)
+
+class LinkingDisk(diskcache.Disk):
+    """
+    diskcache storage that links file values into the cache instead of copying them.
+    
+    The stock Disk streams file values through Python in 4MB reads; converted
+    files are hardlinked into place instead, falling back to shutil.copyfile
+    (which uses the kernel's copy_file_range/sendfile on Linux) across filesystems.
+    """
+
+    def store(self, value, read, key=diskcache.core.UNKNOWN):
+        if not (read and isinstance(getattr(value, 'name', None), str)):
+            return super().store(value, read, key=key)
+        filename, full_path = self.filename(key, value)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        link_or_copy(value.name, full_path)
+        return os.path.getsize(full_path), diskcache.core.MODE_BINARY, filename, None
+
+# Open the conversion result cache next to the upload directory
+try:
+    cache_dir = os.path.join(os.path.dirname(upload_dir), 'cache')
+    result_cache = diskcache.Cache(
+        cache_dir,
+        size_limit=app.config['CACHE_SIZE_LIMIT'],
+        eviction_policy='least-recently-used',
+        disk=LinkingDisk
+    )
+    app.config['CACHE_FOLDER'] = cache_dir
+    logger.info("Result cache opened at: %s", cache_dir)
 except Exception as e:
-    logger.error(f"Failed to create upload directory: {str(e)}")
+    logger.error("Failed to open result cache: %s", e)
     sys.exit(1)
 
 # Define allowed audio file extensions
-ALLOWED_EXTENSIONS = {'wav', 'mp3', 'ogg', 'm4a', 'flac', 'aax'}
+ALLOWED_EXTENSIONS = frozenset({'wav', 'mp3', 'ogg', 'm4a', 'flac', 'aax'})
+
+# FFmpeg audio encoder used for each supported output format
+AUDIO_CODECS = {
+    'mp3': 'libmp3lame',
+    'ogg': 'libvorbis',
+    'flac': 'flac',
+    'wav': 'pcm_s16le',
+    'm4a': 'aac',
+}
+
+# Lossless encoders ignore bitrate settings
+LOSSLESS_CODECS = {'flac', 'pcm_s16le'}
+
+# Stream codec (as reported by ffprobe) that each output format's encoder produces;
+# inputs already carrying it can be remuxed with `-c:a copy` instead of re-encoded
+STREAM_CODECS = {
+    'mp3': 'mp3',
+    'ogg': 'vorbis',
+    'flac': 'flac',
+    'wav': 'pcm_s16le',
+    'm4a': 'aac',
+}
+
+# Containers that can carry embedded cover art as an attached picture stream
+COVER_ART_FORMATS = {'mp3', 'flac', 'm4a'}
+
+# Activation bytes as users type them (hex digits with optional dashes/spaces),
+# and the cleaned form FFmpeg expects
+ACTIVATION_BYTES_INPUT_RE = re.compile(r'[0-9a-fA-F\s-]{8,20}')
+ACTIVATION_BYTES_RE = re.compile(r'[0-9a-f]{8}')
+ACTIVATION_BYTES_STRIP = str.maketrans('', '', '- ')
+
+# Uploads are written to disk in UPLOAD_BUFFER_SIZE blocks from buffers that
+# are recycled between requests; at most UPLOAD_BUFFER_POOL_SIZE stay pooled
+UPLOAD_BUFFER_SIZE = 1 << 20
+UPLOAD_BUFFER_POOL_SIZE = 16
+UPLOAD_WRITER_THREADS = 4
+
+# Bounds concurrent FFmpeg processes, like `parallel --jobs=N`
+conversion_slots = asyncio.Semaphore(app.config['CONVERT_JOBS'])
+
+@dataclass
+class JobState:
+    """
+    State of a background conversion job.
+    
+    Attributes:
+        status (str): One of 'queued', 'running', 'done' or 'error'
+        percent (float): Conversion progress, if the input duration is known
+        output_path (str): Path to the converted file once the job is done
+        error (str): Error message if the job failed
+        created_at (float): Time the job was queued, used to expire it
+    """
+    status: str = 'queued'
+    percent: float | None = None
+    output_path: str | None = None
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+
+# In-memory registry of conversion jobs, keyed by job id
+jobs: dict[str, JobState] = {}
+
+# Files waiting to be deleted by the background remover
+deletion_queue: asyncio.Queue = asyncio.Queue()
 
 def allowed_file(filename: str) -> bool:
     """
@@ -67,16 +201,480 @@ def allowed_file(filename: str) -> bool:
     Returns:
         bool: True if the file extension is allowed, False otherwise
     """
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return os.path.splitext(filename)[1][1:].lower() in ALLOWED_EXTENSIONS
+
+# secure_filename runs several regex passes; uploads and downloads reuse the same names
+cached_secure_filename = functools.lru_cache(maxsize=1024)(secure_filename)
+
+class RecyclableBufferPool:
+    """Thread-safe pool of fixed-size bytearrays reused across uploads."""
+
+    def __init__(self, buffer_size: int, max_buffers: int):
+        self.buffer_size = buffer_size
+        self.max_buffers = max_buffers
+        self._buffers = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bytearray:
+        """
+        Take a buffer from the pool, allocating a new one if the pool is empty.
+        
+        Returns:
+            bytearray: Buffer of buffer_size bytes
+        """
+        with self._lock:
+            if self._buffers:
+                return self._buffers.pop()
+        return bytearray(self.buffer_size)
+
+    def release(self, buffer: bytearray) -> None:
+        """
+        Return a buffer to the pool; buffers beyond max_buffers are dropped.
+        
+        Args:
+            buffer (bytearray): Buffer previously returned by acquire
+        """
+        with self._lock:
+            if len(self._buffers) < self.max_buffers:
+                self._buffers.append(buffer)
+
+upload_buffers = RecyclableBufferPool(UPLOAD_BUFFER_SIZE, UPLOAD_BUFFER_POOL_SIZE)
+
+# Threads that hash and store upload blocks off the event loop
+upload_writer = concurrent.futures.ThreadPoolExecutor(
+    max_workers=UPLOAD_WRITER_THREADS, thread_name_prefix='upload-writer'
+)
+
+class HashingFile(io.FileIO):
+    """
+    File that keeps a BLAKE2b digest of everything written to it.
+    
+    The form parser calls write() on the event loop with chunks of at most
+    64KB; they are coalesced into a pooled buffer, and each megabyte is hashed
+    and written by upload_writer, so neither slow storage nor hashing stalls
+    other requests. Blocks are stored with os.pwrite at explicit offsets, so
+    the writer thread never races the file position the parser moves with
+    seek(). A file has at most one block in flight; when storage falls behind
+    the client, write() waits for it rather than queueing the upload in memory.
+    
+    The buffer is only taken on the first write and handed to the writer when
+    the parser seeks to the start at the end of the part, so a request holds
+    at most two buffers however many parts it has. open(..., buffering=1 << 20)
+    would instead allocate a fresh 1MB buffer per part when it is opened, keep
+    it until the part is closed, and write it out on the event loop.
+    
+    Finish with aclose() from async code; close() blocks until the last
+    block is written.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path, 'w+')
+        self.hasher = hashlib.blake2b()
+        self._buffer = None
+        self._buffered = 0
+        self._offset = 0
+        self._pending = None
+
+    def write(self, data) -> int:
+        view = memoryview(data).cast('B')
+        size = len(view)
+        while view:
+            if self._buffer is None:
+                self._buffer = upload_buffers.acquire()
+            count = min(len(view), len(self._buffer) - self._buffered)
+            self._buffer[self._buffered:self._buffered + count] = view[:count]
+            self._buffered += count
+            view = view[count:]
+            if self._buffered == len(self._buffer):
+                self.flush()
+        return size
+
+    def _write_block(self, buffer: bytearray, length: int, offset: int) -> None:
+        """Hash and store one block; runs on the upload_writer thread."""
+        try:
+            with memoryview(buffer) as view:
+                block = view[:length]
+                self.hasher.update(block)
+                written = 0
+                # pwrite may be partial; the form parser expects every byte stored
+                while written < length:
+                    written += os.pwrite(self.fileno(), block[written:], offset + written)
+                block.release()
+        finally:
+            upload_buffers.release(buffer)
+
+    def flush(self) -> None:
+        """Hand any coalesced data to the writer thread and give up the buffer."""
+        if self._buffer is None:
+            return
+        buffer, length, offset = self._buffer, self._buffered, self._offset
+        self._buffer, self._buffered = None, 0
+        self._offset += length
+        if self._pending is not None:
+            # Blocks must be hashed in order, and one in flight bounds memory
+            self._pending.result()
+        self._pending = upload_writer.submit(self._write_block, buffer, length, offset)
+
+    def seek(self, pos: int, whence: int = os.SEEK_SET) -> int:
+        self.flush()
+        return super().seek(pos, whence)
+
+    async def aclose(self) -> None:
+        """Write out the remaining data and close without blocking the event loop."""
+        if self.closed:
+            return
+        try:
+            if self._pending is not None:
+                await asyncio.wrap_future(self._pending)
+            self.flush()
+            if self._pending is not None:
+                await asyncio.wrap_future(self._pending)
+        finally:
+            super().close()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self.flush()
+            if self._pending is not None:
+                self._pending.result()
+        finally:
+            super().close()
+
+def sharded_path(filename: str) -> str:
+    """
+    Locate a stored file inside the sharded upload directory.
+    
+    Files live under uploads/<ab>/<cd>/ using the first four characters of
+    their uuid-prefixed name, which keeps every directory small enough for
+    fast lookups no matter how many files accumulate.
+    
+    Args:
+        filename (str): Name of the stored file
+        
+    Returns:
+        str: Absolute path of the file
+    """
+    return os.path.join(app.config['UPLOAD_FOLDER'], filename[:2], filename[2:4], filename)
 
-def convert_aax_to_audio(input_path: str, output_format: str, activation_bytes: str) -> str:
+def upload_stream_factory(total_content_length, content_type, filename, content_length=None):
+    """
+    Open the final on-disk location for an uploaded file part.
+    
+    The form parser writes each chunk of the multipart body into the returned
+    file as it arrives, so uploads never sit in memory or in a spooled
+    temporary file that has to be copied later. The content is hashed on the
+    way through so repeated uploads can be served from the result cache.
+    
+    Args:
+        total_content_length (int): Length of the whole request body
+        content_type (str): Content type of the file part
+        filename (str): Client-supplied name of the file part
+        content_length (int, optional): Length of the file part, if known
+        
+    Returns:
+        HashingFile: Writable file handle inside the upload directory
+    """
+    safe_name = cached_secure_filename(filename or '')
+    # secure_filename drops non-ASCII names entirely ('Книга.mp3' becomes
+    # 'mp3'); keep the extension so conversion can still tell the input type
+    extension = os.path.splitext(filename or '')[1][1:].lower()
+    if extension in ALLOWED_EXTENSIONS and os.path.splitext(safe_name)[1][1:].lower() != extension:
+        safe_name = f"{safe_name}.{extension}"
+    unique_filename = f"{uuid.uuid4()}_{safe_name}"
+    path = sharded_path(unique_filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return HashingFile(path)
+
+class UploadRequest(Request):
+    """Request class that streams uploaded files directly into the upload directory."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Every file the parser opened, so a failed parse can discard them all
+        self.upload_streams: list[HashingFile] = []
+
+    def open_upload_stream(self, *args, **kwargs) -> HashingFile:
+        stream = upload_stream_factory(*args, **kwargs)
+        self.upload_streams.append(stream)
+        return stream
+
+    def make_form_data_parser(self):
+        return self.form_data_parser_class(
+            stream_factory=self.open_upload_stream,
+            max_content_length=self.max_content_length,
+            max_form_memory_size=self.max_form_memory_size,
+            max_form_parts=self.max_form_parts,
+            cls=self.parameter_storage_class,
+        )
+
+app.request_class = UploadRequest
+
+async def discard_upload(stream: HashingFile) -> None:
+    """
+    Close an uploaded file that will not be converted and queue it for deletion.
+    
+    Args:
+        stream (HashingFile): File opened by upload_stream_factory
+    """
+    await stream.aclose()
+    deletion_queue.put_nowait(stream.name)
+
+def clean_activation_bytes(activation_bytes: str) -> str:
+    """
+    Normalize and validate Audible activation bytes.
+    
+    Args:
+        activation_bytes (str): Activation bytes as entered by the user
+        
+    Returns:
+        str: Eight lowercase hex digits without separators
+        
+    Raises:
+        ValueError: If activation bytes are invalid
+    """
+    if not activation_bytes or not ACTIVATION_BYTES_INPUT_RE.fullmatch(activation_bytes):
+        raise ValueError("Invalid activation bytes format")
+    clean = activation_bytes.translate(ACTIVATION_BYTES_STRIP).lower()
+    if not ACTIVATION_BYTES_RE.fullmatch(clean):
+        raise ValueError("Invalid activation bytes format")
+    return clean
+
+def output_path_for(input_path: str, output_format: str) -> str:
+    """
+    Derive the converted file's path from the uploaded file's path.
+    
+    Args:
+        input_path (str): Path to the input audio file
+        output_format (str): Desired output format
+        
+    Returns:
+        str: Path with the extension replaced by the output format
+    """
+    return os.path.splitext(input_path)[0] + f'.{output_format}'
+
+def is_same_format(input_path: str, output_format: str) -> bool:
+    """
+    Check whether a stored upload is already in the requested output format.
+    
+    Args:
+        input_path (str): Path to the input audio file
+        output_format (str): Desired output format
+        
+    Returns:
+        bool: True if the file's extension matches the output format, ignoring case
+    """
+    return os.path.splitext(input_path)[1][1:].lower() == output_format
+
+def result_cache_key(digest: str, output_format: str, activation_bytes: str = None) -> tuple:
+    """
+    Build the result cache key for a conversion.
+    
+    Activation bytes only ever enter the key as a truncated SHA-256 hash, so
+    they are never stored in plaintext.
+    
+    Args:
+        digest (str): Hex digest of the uploaded file's content
+        output_format (str): Desired output format
+        activation_bytes (str, optional): Activation bytes for AAX files
+        
+    Returns:
+        tuple: (content digest, output format, activation bytes hash)
+    """
+    activation_hash = ''
+    if activation_bytes:
+        activation_hash = hashlib.sha256(clean_activation_bytes(activation_bytes).encode()).hexdigest()[:16]
+    return (digest, output_format, activation_hash)
+
+def link_or_copy(src: str, dst: str) -> None:
+    """
+    Hardlink src to dst, copying instead when they are on different filesystems.
+    
+    Args:
+        src (str): Existing file
+        dst (str): Path to create
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def fetch_cached_result(key: tuple, output_path: str) -> str | None:
+    """
+    Materialize a cached conversion result at output_path.
+    
+    Args:
+        key (tuple): Key from result_cache_key
+        output_path (str): Where the converted file should appear
+        
+    Returns:
+        str | None: output_path on a cache hit, None on a miss
+    """
+    cached = result_cache.get(key, read=True)
+    if cached is None:
+        return None
+    try:
+        with cached:
+            link_or_copy(cached.name, output_path)
+        # A hardlink shares the cached inode's mtime; refresh it so the
+        # expiry sweep measures the TTL from this job, not the original one
+        os.utime(output_path)
+    except OSError as e:
+        # The entry may have been evicted while we were linking it
+        logger.debug("Cached result unavailable: %s", e)
+        return None
+    return output_path
+
+def store_cached_result(key: tuple, output_path: str) -> None:
+    """
+    Store a finished conversion in the result cache.
+    
+    LinkingDisk hardlinks the file into the cache directory, so this does not
+    copy the converted audio through userspace.
+    
+    Args:
+        key (tuple): Key from result_cache_key
+        output_path (str): Path to the converted file
+    """
+    with open(output_path, 'rb') as f:
+        result_cache.set(key, f, read=True)
+
+def codec_args(output_format: str, source_codec: str = None) -> list:
+    """
+    Build the FFmpeg codec arguments for an output format.
+    
+    Audio that is already in the target codec is stream-copied, so only the
+    container changes. Cover art is copied into containers that support it and
+    dropped otherwise, so it is never decoded and re-encoded. All cores are
+    made available to the encoder.
+    
+    Args:
+        output_format (str): Desired output format
+        source_codec (str, optional): Audio codec of the input, as reported by ffprobe
+        
+    Returns:
+        list: FFmpeg arguments selecting the audio codec, bitrate and cover art handling
+        
+    Raises:
+        ValueError: If the output format is not supported
+    """
+    codec = AUDIO_CODECS.get(output_format)
+    if codec is None:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    video = ['-c:v', 'copy'] if output_format in COVER_ART_FORMATS else ['-vn']
+    if source_codec is not None and source_codec == STREAM_CODECS[output_format]:
+        return ['-c:a', 'copy', *video]
+    if codec in LOSSLESS_CODECS:
+        return ['-threads', '0', '-c:a', codec, *video]
+    return ['-threads', '0', '-c:a', codec, '-b:a', '192k', *video]  # Set bitrate for good quality
+
+async def probe_audio(input_path: str) -> tuple:
+    """
+    Read the duration and audio codec of a file with a one-shot ffprobe call.
+    
+    Args:
+        input_path (str): Path to the audio file
+        
+    Returns:
+        tuple: (duration in seconds, audio codec name); either is None if it
+        cannot be determined
+    """
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-show_entries', 'format=duration:stream=codec_type,codec_name',
+        '-of', 'json',
+        input_path
+    ]
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        stdout, _ = await proc.communicate()
+        info = json.loads(stdout)
+    except (OSError, ValueError) as e:
+        logger.debug("Could not probe %s: %s", input_path, e)
+        return None, None
+    
+    try:
+        duration = float(info['format']['duration'])
+    except (KeyError, ValueError):
+        duration = None
+    codec = next(
+        (stream.get('codec_name') for stream in info.get('streams', []) if stream.get('codec_type') == 'audio'),
+        None
+    )
+    return duration, codec
+
+async def run_ffmpeg(cmd: list, on_progress=None) -> None:
+    """
+    Run an FFmpeg command without blocking the event loop.
+    
+    FFmpeg is exec'd directly (no shell, no preexec_fn) so CPython can use its
+    posix_spawn fast path, and only error-level output is captured on stderr.
+    Commands wait for a free slot in conversion_slots, so concurrent uploads
+    queue up instead of oversubscribing the CPU.
+    
+    Args:
+        cmd (list): FFmpeg argument vector, starting with the executable
+        on_progress (callable, optional): Called with the number of seconds of
+            output written so far; called with 0.0 once FFmpeg has started
+        
+    Raises:
+        subprocess.CalledProcessError: If FFmpeg exits with a non-zero status
+        asyncio.CancelledError: If the caller is cancelled; FFmpeg is killed first
+    """
+    cmd = [cmd[0], '-nostdin', '-nostats', '-loglevel', 'error', *cmd[1:]]
+    if on_progress is not None:
+        # Emits key=value progress lines on stdout roughly every 500ms
+        cmd[1:1] = ['-progress', 'pipe:1']
+    async with conversion_slots:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE if on_progress else asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
+        )
+        stderr_task = None
+        try:
+            if on_progress is None:
+                # communicate() keeps draining stderr so a chatty failure cannot fill the pipe
+                _, stderr = await proc.communicate()
+            else:
+                on_progress(0.0)
+                stderr_task = asyncio.create_task(proc.stderr.read())
+                async for line in proc.stdout:
+                    key, _, value = line.decode().strip().partition('=')
+                    if key == 'out_time_us' and value.isdigit():
+                        on_progress(int(value) / 1_000_000)
+                stderr = await stderr_task
+                await proc.wait()
+        except (asyncio.CancelledError, Exception):
+            # FFmpeg runs in its own session, so nothing else would stop it
+            # from writing into the upload directory after the job is gone
+            if stderr_task is not None:
+                stderr_task.cancel()
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr)
+
+async def convert_aax_to_audio(input_path: str, output_format: str, activation_bytes: str, on_progress=None, source_codec: str = None) -> str:
     """
     Convert Audible AAX files to standard audio formats using FFmpeg.
     
     Args:
         input_path (str): Path to the input AAX file
-        output_format (str): Desired output format (mp3/wav)
+        output_format (str): Desired output format
         activation_bytes (str): Audible activation bytes for DRM removal
+        on_progress (callable, optional): Progress callback passed to run_ffmpeg
+        source_codec (str, optional): Audio codec of the input, enabling stream copy
         
     Returns:
         str: Path to the converted audio file
@@ -85,36 +683,33 @@ def convert_aax_to_audio(input_path: str, output_format: str, activation_bytes:
         subprocess.CalledProcessError: If FFmpeg conversion fails
         ValueError: If activation bytes are invalid
     """
-    logger.debug(f"Converting AAX file: {input_path} to {output_format}")
+    logger.debug("Converting AAX file: %s to %s", input_path, output_format)
     
     # Clean and validate activation bytes
-    clean_activation_bytes = activation_bytes.replace('-', '').replace(' ', '').lower()
-    if not clean_activation_bytes or len(clean_activation_bytes) != 8:
-        raise ValueError("Invalid activation bytes format")
+    activation_key = clean_activation_bytes(activation_bytes)
     
-    output_path = input_path.rsplit('.', 1)[0] + f'.{output_format}'
+    output_path = output_path_for(input_path, output_format)
     
     # Construct FFmpeg command with appropriate codec and quality settings
     cmd = [
         'ffmpeg', '-y',
-        '-activation_bytes', clean_activation_bytes,
+        '-activation_bytes', activation_key,
         '-i', input_path,
-        '-c:a', 'libmp3lame' if output_format == 'mp3' else 'pcm_s16le',
-        '-ab', '192k',  # Set bitrate for good quality
+        *codec_args(output_format, source_codec),
         '-map_metadata', '0',  # Preserve metadata
         '-id3v2_version', '3',  # Use ID3v2.3 format for better compatibility
         output_path
     ]
     
     try:
-        subprocess.run(cmd, check=True, capture_output=True)
-        logger.debug(f"AAX conversion successful: {output_path}")
+        await run_ffmpeg(cmd, on_progress)
+        logger.debug("AAX conversion successful: %s", output_path)
         return output_path
     except subprocess.CalledProcessError as e:
-        logger.error(f"FFmpeg conversion failed: {e.stderr.decode()}")
+        logger.error("FFmpeg conversion failed: %s", e.stderr.decode())
         raise
 
-def convert_audio(input_path: str, output_format: str, activation_bytes: str = None) -> str:
+async def convert_audio(input_path: str, output_format: str, activation_bytes: str = None, on_progress=None, source_codec: str = None) -> str:
     """
     Convert audio files between formats. Handles both AAX and standard audio formats.
     
@@ -122,25 +717,190 @@ def convert_audio(input_path: str, output_format: str, activation_bytes: str = N
         input_path (str): Path to the input audio file
         output_format (str): Desired output format
         activation_bytes (str, optional): Activation bytes for AAX files
+        on_progress (callable, optional): Progress callback passed to run_ffmpeg
+        source_codec (str, optional): Audio codec of the input, enabling stream copy
         
     Returns:
         str: Path to the converted audio file
     """
-    logger.debug(f"Converting file: {input_path} to format: {output_format}")
+    logger.debug("Converting file: %s to format: %s", input_path, output_format)
     
     # Handle AAX files differently
     if input_path.lower().endswith('.aax'):
-        return convert_aax_to_audio(input_path, output_format, activation_bytes)
+        return await convert_aax_to_audio(input_path, output_format, activation_bytes, on_progress, source_codec)
     
-    # Handle standard audio formats using pydub
-    audio = AudioSegment.from_file(input_path)
-    output_path = input_path.rsplit('.', 1)[0] + f'.{output_format}'
-    audio.export(output_path, format=output_format)
-    logger.debug(f"Conversion complete. Output file: {output_path}")
+    # The upload already has a unique name, so a same-format request can be
+    # served as-is instead of decoding and re-encoding the whole stream
+    if is_same_format(input_path, output_format):
+        logger.debug("Input is already %s, skipping conversion", output_format)
+        return input_path
+    
+    # Transcode standard audio formats with FFmpeg, which streams the input
+    # instead of decoding the whole file into memory
+    output_path = output_path_for(input_path, output_format)
+    cmd = [
+        'ffmpeg', '-y',
+        '-i', input_path,
+        *codec_args(output_format, source_codec),
+        output_path
+    ]
+    
+    try:
+        await run_ffmpeg(cmd, on_progress)
+    except subprocess.CalledProcessError as e:
+        logger.error("FFmpeg conversion failed: %s", e.stderr.decode())
+        raise
+    logger.debug("Conversion complete. Output file: %s", output_path)
     return output_path
 
+async def run_conversion_job(job_id: str, input_path: str, digest: str, target_format: str, activation_bytes: str = None) -> None:
+    """
+    Convert an uploaded file in the background and record the outcome in jobs.
+    
+    Results are looked up in, and added to, the result cache so a repeated
+    upload of the same content is served without running FFmpeg.
+    
+    Args:
+        job_id (str): Id of the job to update
+        input_path (str): Path to the uploaded file
+        digest (str): Hex digest of the uploaded file's content
+        target_format (str): Desired output format
+        activation_bytes (str, optional): Activation bytes for AAX files
+    """
+    job = jobs[job_id]
+    duration = None
+    
+    def on_progress(seconds):
+        job.status = 'running'
+        if duration:
+            job.percent = min(100.0, round(seconds / duration * 100, 1))
+    
+    output_path = None
+    try:
+        if is_same_format(input_path, target_format):
+            # Same-format requests are served from the upload itself
+            output_path = await convert_audio(input_path, target_format, activation_bytes)
+        else:
+            # Only AAX inputs are decrypted, so a stray activation_bytes field on
+            # other uploads must neither be validated nor split the cache entry
+            key_activation_bytes = activation_bytes if input_path.lower().endswith('.aax') else None
+            key = result_cache_key(digest, target_format, key_activation_bytes)
+            output_path = await asyncio.to_thread(fetch_cached_result, key, output_path_for(input_path, target_format))
+            if output_path is not None:
+                logger.debug("Job %s served from result cache", job_id)
+            else:
+                duration, source_codec = await probe_audio(input_path)
+                output_path = await convert_audio(input_path, target_format, activation_bytes, on_progress, source_codec)
+                try:
+                    await asyncio.to_thread(store_cached_result, key, output_path)
+                except Exception as e:
+                    # The cache only saves future work; the conversion itself succeeded
+                    logger.error("Failed to cache result for job %s: %s", job_id, e)
+        job.output_path = output_path
+        job.percent = 100.0
+        job.status = 'done'
+        logger.debug("Job %s finished: %s", job_id, output_path)
+    except subprocess.CalledProcessError:
+        # The command line holds server paths and activation bytes; keep it out of the response
+        job.error = 'FFmpeg conversion failed'
+        job.status = 'error'
+    except Exception as e:
+        logger.error("Job %s failed: %s", job_id, e)
+        job.error = str(e)
+        job.status = 'error'
+    finally:
+        # Clean up input file if it's different from output, without blocking on the unlink
+        if output_path is None or os.path.abspath(input_path) != os.path.abspath(output_path):
+            deletion_queue.put_nowait(input_path)
+        # Reap the subprocess/stream objects left over from the conversion
+        gc.collect(1)
+
+@app.before_serving
+async def warm_up_ffmpeg():
+    """
+    Run FFmpeg and ffprobe once at startup.
+    
+    Pages their executables and shared codec libraries into memory so the
+    first conversions do not pay the cold-start cost, and reports a missing
+    installation before any upload arrives.
+    """
+    for tool in ('ffmpeg', 'ffprobe'):
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                tool, '-version',
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            await proc.wait()
+            logger.debug("Warmed up %s", tool)
+        except FileNotFoundError:
+            logger.error("%s not found. Please install it first.", tool)
+
+def remove_expired_files(cutoff: float) -> None:
+    """
+    Delete stored files last modified before cutoff.
+    
+    Args:
+        cutoff (float): Unix timestamp; older files are removed
+    """
+    for root, _, filenames in os.walk(app.config['UPLOAD_FOLDER']):
+        for name in filenames:
+            path = os.path.join(root, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    logger.debug("Removed expired file: %s", path)
+            except OSError as e:
+                logger.error("Failed to remove expired file: %s", e)
+
+async def clean_expired_files() -> None:
+    """
+    Periodically delete expired files and forget finished jobs that used them.
+    """
+    ttl = app.config['FILE_TTL']
+    while True:
+        cutoff = time.time() - ttl
+        await asyncio.to_thread(remove_expired_files, cutoff)
+        for job_id, job in list(jobs.items()):
+            if job.status in ('done', 'error') and job.created_at < cutoff:
+                del jobs[job_id]
+        await asyncio.sleep(min(ttl, 60 * 60))
+
+async def remove_queued_files() -> None:
+    """
+    Delete files pushed onto deletion_queue, one at a time, off the event loop.
+    
+    An unlink on slow storage can take seconds; doing it here keeps it out of
+    request handlers and conversion jobs. Anything left in the queue at
+    shutdown is picked up later by clean_expired_files.
+    """
+    while True:
+        path = await deletion_queue.get()
+        try:
+            await asyncio.to_thread(os.remove, path)
+            logger.debug("Removed file: %s", path)
+        except OSError as e:
+            logger.error("Failed to remove file: %s", e)
+        finally:
+            deletion_queue.task_done()
+
+@app.before_serving
+async def start_cleaner():
+    """Start the background tasks that delete queued and expired files."""
+    app.cleaner_tasks = [
+        asyncio.create_task(remove_queued_files()),
+        asyncio.create_task(clean_expired_files()),
+    ]
+
+@app.after_serving
+async def stop_cleaner():
+    """Stop the cleanup tasks on shutdown."""
+    for task in app.cleaner_tasks:
+        task.cancel()
+
 @app.route('/')
-def index():
+async def index():
     """
     Render the main page of the application.
     
@@ -149,94 +909,188 @@ def index():
     """
     logger.debug("Serving index page")
     try:
-        return render_template('index.html')
+        return await render_template('index.html')
     except Exception as e:
-        logger.error(f"Error serving index page: {str(e)}")
+        logger.error("Error serving index page: %s", e)
         return str(e), 500
 
 @app.route('/upload', methods=['POST'])
-def upload_file():
+async def upload_file():
     """
-    Handle file uploads and conversion requests.
+    Handle file uploads and queue one conversion job per file.
+    
+    Each file becomes its own background job, so a batch upload converts its
+    files in parallel (bounded by conversion_slots) instead of one after another.
     
     Expects:
-        - File in request.files['file']
+        - One or more files in request.files['file']
         - Format in request.form['format']
         - Activation bytes in request.form['activation_bytes'] for AAX files
         
     Returns:
-        JSON: Success status and download URL or error message
+        JSON: 202 with a per-file list of job ids and status URLs or errors,
+        or an error message if no file could be queued
     """
     logger.debug("Upload endpoint called")
-    logger.debug(f"Files in request: {request.files}")
-    logger.debug(f"Form data: {request.form}")
+    try:
+        files = await request.files
+        form = await request.form
+    except (asyncio.CancelledError, Exception):
+        # The parser opens a file per part as it arrives; none of them will be converted
+        for stream in request.upload_streams:
+            await discard_upload(stream)
+        raise
+    logger.debug("Files in request: %s", files)
+    logger.debug("Form data: %s", form)
 
-    if 'file' not in request.files:
+    # The parser has written every file part to disk, but only 'file' is converted
+    for name, file in files.items(multi=True):
+        if name != 'file':
+            logger.debug("Discarding unexpected file field: %s", name)
+            await discard_upload(file.stream)
+
+    if 'file' not in files:
         logger.error("No file part in request")
         return jsonify({'error': 'No file part'}), 400
     
-    file = request.files['file']
-    if file.filename == '':
-        logger.error("No selected file")
-        return jsonify({'error': 'No selected file'}), 400
+    uploads = files.getlist('file')
+    
+    # Get target format and activation bytes from request
+    target_format = form.get('format', 'mp3')
+    activation_bytes = form.get('activation_bytes')
     
-    if not allowed_file(file.filename):
-        logger.error(f"File type not allowed: {file.filename}")
-        return jsonify({'error': 'File type not allowed'}), 400
+    if target_format not in AUDIO_CODECS:
+        logger.error("Unsupported output format: %s", target_format)
+        for file in uploads:
+            await discard_upload(file.stream)
+        return jsonify({'error': 'Unsupported output format'}), 400
     
+    logger.debug("Target format: %s", target_format)
+    if activation_bytes:
+        logger.debug("Activation bytes provided: %s", activation_bytes)
+    
+    results = []
     try:
-        # Generate unique filename
-        filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4()}_{filename}"
-        input_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        logger.debug(f"Saving file to: {input_path}")
-        file.save(input_path)
-        
-        # Get target format and activation bytes from request
-        target_format = request.form.get('format', 'mp3')
-        activation_bytes = request.form.get('activation_bytes')
-        
-        logger.debug(f"Target format: {target_format}")
-        if activation_bytes:
-            logger.debug(f"Activation bytes provided: {activation_bytes}")
-        
-        output_path = convert_audio(input_path, target_format, activation_bytes)
-        download_url = f'/download/{os.path.basename(output_path)}'
-        logger.debug(f"Download URL: {download_url}")
-        
-        # Clean up input file if it's different from output
-        if os.path.abspath(input_path) != os.path.abspath(output_path):
-            os.remove(input_path)
-        
-        return jsonify({
-            'success': True,
-            'download_url': download_url
-        })
+        for file in uploads:
+            if file.filename == '':
+                logger.error("No selected file")
+                await discard_upload(file.stream)
+                results.append({'filename': file.filename, 'error': 'No selected file'})
+                continue
+            
+            if not allowed_file(file.filename):
+                logger.error("File type not allowed: %s", file.filename)
+                await discard_upload(file.stream)
+                results.append({'filename': file.filename, 'error': 'File type not allowed'})
+                continue
+            
+            if file.filename.lower().endswith('.aax'):
+                # Reject bad activation bytes now rather than after FFmpeg starts decrypting
+                try:
+                    clean_activation_bytes(activation_bytes)
+                except ValueError as e:
+                    logger.error("Invalid activation bytes for: %s", file.filename)
+                    await discard_upload(file.stream)
+                    results.append({'filename': file.filename, 'error': str(e)})
+                    continue
+            
+            # The parser has already streamed the upload to a unique path on disk
+            input_path = file.stream.name
+            await file.stream.aclose()
+            digest = file.stream.hasher.hexdigest()
+            logger.debug("Upload saved to: %s", input_path)
+            
+            job_id = str(uuid.uuid4())
+            jobs[job_id] = JobState()
+            app.add_background_task(run_conversion_job, job_id, input_path, digest, target_format, activation_bytes)
+            logger.debug("Queued job %s for %s", job_id, input_path)
+            results.append({
+                'filename': file.filename,
+                'job_id': job_id,
+                'status_url': f'/status/{job_id}'
+            })
     except Exception as e:
-        logger.error(f"Error processing upload: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        logger.error("Error processing upload: %s", e)
+        # Files already handed to a job were closed; discard the rest
+        for file in uploads:
+            if not file.stream.closed:
+                await discard_upload(file.stream)
+        return jsonify({'error': str(e), 'jobs': results}), 500
+    
+    if not any('job_id' in result for result in results):
+        return jsonify({'error': results[0]['error'], 'jobs': results}), 400
+    
+    return jsonify({
+        'success': True,
+        'jobs': results
+    }), 202
+
+@app.route('/status/<job_id>')
+async def job_status(job_id):
+    """
+    Report the state of a conversion job.
+    
+    Args:
+        job_id (str): Id returned by the upload endpoint
+        
+    Returns:
+        JSON: Job status and progress, plus the download URL once done
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    payload = {
+        'job_id': job_id,
+        'status': job.status,
+        'percent': job.percent
+    }
+    if job.status == 'done':
+        payload['download_url'] = f'/download/{os.path.basename(job.output_path)}'
+    elif job.status == 'error':
+        payload['error'] = job.error
+    return jsonify(payload)
 
 @app.route('/download/<filename>')
-def download_file(filename):
+async def download_file(filename):
     """
     Serve converted files for download.
     
+    When a fronting nginx sets the X-Accel-Mapping header to the URI prefix of
+    an internal location aliased to the upload directory, the transfer is
+    handed back to nginx via X-Accel-Redirect so the kernel can sendfile(2) it.
+    Otherwise the file is streamed by Quart.
+    
     Args:
         filename (str): Name of the file to download
         
     Returns:
         Response: File download response or error message
     """
-    logger.debug(f"Download requested for file: {filename}")
+    logger.debug("Download requested for file: %s", filename)
     try:
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        logger.debug(f"Full file path: {file_path}")
-        if not os.path.exists(file_path):
-            logger.error(f"File not found: {file_path}")
+        # Shorter names would map into the shard directories themselves
+        if len(filename) < 5 or cached_secure_filename(filename) != filename:
+            logger.error("Invalid download name: %s", filename)
             return jsonify({'error': 'File not found'}), 404
-        return send_file(file_path, as_attachment=True)
+        
+        file_path = sharded_path(filename)
+        logger.debug("Full file path: %s", file_path)
+        if not os.path.isfile(file_path):
+            logger.error("File not found: %s", file_path)
+            return jsonify({'error': 'File not found'}), 404
+        
+        accel_prefix = request.headers.get('X-Accel-Mapping')
+        if accel_prefix:
+            logger.debug("Offloading download to nginx under: %s", accel_prefix)
+            return Response('', headers={
+                'X-Accel-Redirect': f"{accel_prefix.rstrip('/')}/{filename[:2]}/{filename[2:4]}/{filename}",
+                'Content-Type': mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                'Content-Disposition': f'attachment; filename="{filename}"'
+            })
+        return await send_file(file_path, as_attachment=True, conditional=True)
     except Exception as e:
-        logger.error(f"Error serving download: {str(e)}")
+        logger.error("Error serving download: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.after_request
@@ -245,7 +1099,7 @@ def after_request(response):
     Add CORS headers to all responses.
     
     Args:
-        response: Flask response object
+        response: Quart response object
         
     Returns:
         Response: Modified response with CORS headers
@@ -266,8 +1120,9 @@ if __name__ == '__main__':
             print("brew install ffmpeg")
             sys.exit(1)
             
-        logger.info("Starting Flask application...")
-        app.run(debug=True, host='127.0.0.1', port=5002)
+        # Development server only; production runs under Hypercorn (see hypercorn_conf.py)
+        logger.info("Starting Quart application...")
+        app.run(debug=os.environ.get('QUART_DEBUG') == '1', host='127.0.0.1', port=5002)
     except Exception as e:
-        logger.error(f"Failed to start Flask application: {str(e)}")
+        logger.error("Failed to start Quart application: %s", e)
         sys.exit(1) 
\ No newline at end of file
@@ -0,0 +1,25 @@
+"""
+Hypercorn configuration for production deployments of the audio converter.
+
+Usage:
+    hypercorn --config file:hypercorn_conf.py app:app
+
+Conversions run in FFmpeg child processes scheduled by the event loop, so a
+single worker already uses every core (bounded by AUDIO_CONVERT_JOBS). Job
+state is kept in the worker's memory, so only raise WEB_CONCURRENCY behind a
+proxy that routes a client's status polls back to the worker that accepted
+its upload.
+"""
+
+import os
+
+bind = [os.environ.get('BIND', '127.0.0.1:5002')]
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'asyncio'
+
+# Allow in-flight uploads and downloads of large audiobooks to finish on restart
+graceful_timeout = 60
+
+keep_alive_timeout = 5
+accesslog = '-'
+errorlog = '-'
@@ -12,6 +12,9 @@ import axios from 'axios';
 /** Base URL for the API server */
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5002';
 
+/** Delay between job status polls, in milliseconds */
+const STATUS_POLL_INTERVAL = 1000;
+
 /**
  * Response interface for conversion requests
  * @interface ConversionResponse
@@ -27,9 +30,70 @@ export interface ConversionResponse {
   error?: string;
 }
 
+/**
+ * Outcome of a single uploaded file
+ * @interface UploadedJob
+ */
+interface UploadedJob {
+  /** Name of the uploaded file */
+  filename: string;
+  /** Unique identifier for the conversion job */
+  job_id?: string;
+  /** URL to poll for the job's status */
+  status_url?: string;
+  /** Error message if this file was rejected */
+  error?: string;
+}
+
+/**
+ * Response interface for the upload endpoint, which queues one job per file
+ * @interface UploadResponse
+ */
+interface UploadResponse {
+  /** Whether at least one job was queued */
+  success?: boolean;
+  /** Per-file outcomes, in upload order */
+  jobs?: UploadedJob[];
+  /** Error message if the upload was rejected */
+  error?: string;
+}
+
+/**
+ * Response interface for job status requests
+ * @interface JobStatusResponse
+ */
+interface JobStatusResponse {
+  /** Current job state */
+  status: 'queued' | 'running' | 'done' | 'error';
+  /** Conversion progress, when the input duration is known */
+  percent?: number | null;
+  /** URL to download the converted file once the job is done */
+  download_url?: string;
+  /** Error message if the job failed */
+  error?: string;
+}
+
+/**
+ * Polls a conversion job until it finishes
+ * 
+ * @param statusUrl - Status URL returned by the upload endpoint
+ * @returns Promise<JobStatusResponse> - Final status of the job
+ */
+const waitForJob = async (statusUrl: string): Promise<JobStatusResponse> => {
+  for (;;) {
+    const { data } = await axios.get<JobStatusResponse>(`${API_BASE_URL}${statusUrl}`);
+    if (data.status !== 'queued' && data.status !== 'running') {
+      return data;
+    }
+    await new Promise((resolve) => setTimeout(resolve, STATUS_POLL_INTERVAL));
+  }
+};
+
 /**
  * Converts an audio file to the specified format
  * 
+ * Uploads the file, then polls the queued conversion job until it completes.
+ * 
  * @param file - The audio file to convert
  * @param format - Target format (mp3, wav, ogg, m4a, flac)
  * @param activationBytes - Optional activation bytes for AAX files
@@ -56,7 +120,7 @@ export const convertAudio = async (
       formData.append('activation_bytes', activationBytes);
     }
 
-    const response = await axios.post<ConversionResponse>(
+    const response = await axios.post<UploadResponse>(
       `${API_BASE_URL}/upload`,
       formData,
       {
@@ -66,7 +130,16 @@ export const convertAudio = async (
       }
     );
 
-    return response.data;
+    const { job_id, status_url, error } = response.data.jobs?.[0] ?? {};
+    if (!status_url) {
+      return { success: false, error: error ?? response.data.error };
+    }
+
+    const job = await waitForJob(status_url);
+    if (job.status !== 'done') {
+      return { success: false, conversion_id: job_id, error: job.error || `Unexpected job status: ${job.status}` };
+    }
+    return { success: true, conversion_id: job_id, download_url: job.download_url };
   } catch (error) {
     if (axios.isAxiosError(error) && error.response) {
       return error.response.data as ConversionResponse;
@@ -1,12 +1,17 @@
 #!/bin/bash
 
-# Start Flask backend
-echo "Starting Flask backend..."
+# Start Quart backend
+echo "Starting Quart backend..."
 cd ..
 source venv/bin/activate
-export FLASK_APP=app.py
-export FLASK_ENV=development
-flask run --port 5002 &
+# Use jemalloc when available; it fragments less than glibc malloc in long-running servers
+JEMALLOC=/usr/lib/x86_64-linux-gnu/libjemalloc.so.2
+if [ -f "$JEMALLOC" ]; then
+    LD_PRELOAD="$JEMALLOC" MALLOC_CONF='narenas:4,dirty_decay_ms:1000' \
+        hypercorn --config file:hypercorn_conf.py app:app &
+else
+    hypercorn --config file:hypercorn_conf.py app:app &
+fi
 
 # Start Next.js frontend
 echo "Starting Next.js frontend..."